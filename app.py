@@ -1,16 +1,169 @@
+import glob
+import hashlib
+import os
+import uuid
 import streamlit as st
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import plotly.express as px
-from datetime import datetime
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
+
+try:
+    import polars as pl
+    import polars.selectors as cs
+except ImportError:  # Optional: fall back to the pandas CSV reader
+    pl = cs = None
+
+try:
+    from numba import njit
+except ImportError:  # Optional: fall back to np.bincount for the monthly reductions
+    njit = None
 
 # -------------------- DATA PREPARATION --------------------
 
-@st.cache_data
+# Standard SLA days for each Ship Mode (adjust if needed)
+SLA_MAP = {
+    'Same Day': 1,
+    'First Class': 2,
+    'Second Class': 4,
+    'Standard Class': 5
+}
+UNDEFINED_SLA_DAYS = 999  # Used for undefined modes
+
+# Date layout of the exported CSV; the Polars reader defers any other layout to pandas
+CSV_DATE_FORMAT = '%d-%m-%Y'
+
+# Bump whenever the preprocessed columns change so stale on-disk copies are not reused
+CACHE_VERSION = 6
+
+# Per-user directory for pickled frames (not the shared temp dir: a planted pickle could run code)
+PICKLE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'supply-chain-dashboard')
+
+# Columns the dashboard uses; everything else is dropped right after loading
+KEEP_COLUMNS = ['Order ID', 'Order Date', 'Ship Date', 'Ship Mode', 'Customer ID', 'Customer Name',
+                'Segment', 'Region', 'Category', 'Sub-Category', 'Product Name', 'Sales', 'Quantity',
+                'Discount', 'Profit', 'Shipping_Cost', 'Order Priority',
+                'Order Processing Time', 'Standard SLA Days', 'Is Late', 'Profit Margin',
+                'order_quarter', 'order_year']
+
+# Repeated string values stored as categoricals so filters and groupbys work on integer codes
+CATEGORICAL_COLUMNS = ['Region', 'Ship Mode', 'Segment', 'Category', 'Sub-Category', 'Order Priority',
+                       'Customer ID', 'Customer Name', 'Product Name']
+
+@st.cache_resource
 def load_data(path):
-    """Loads and preprocesses data from a CSV file."""
-    df = pd.read_csv(path)
-    return preprocess(df)
+    """Loads and preprocesses data from a CSV file, reusing on-disk copies when they are up to date.
+
+    The frame is shared by all sessions without copying, so callers must not modify it in place.
+    """
+    # A pickle of the fully typed frame, keyed by the CSV's identity, boots a fresh worker fastest
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_mtime}:{stat.st_size}:{CACHE_VERSION}"
+    pickle_path = os.path.join(PICKLE_CACHE_DIR, f"sc_{hashlib.md5(key.encode()).hexdigest()}.pkl")
+    if os.path.exists(pickle_path):
+        df = read_cached(pickle_path, pd.read_pickle)
+        if df is not None:
+            return df
+
+    parquet_path = f"{path}.parquet"
+    df = None
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= stat.st_mtime:
+        df = read_cached(parquet_path, read_parquet)
+    if df is None:
+        df = read_csv(path)
+        try:
+            write_atomic(parquet_path, lambda p: write_parquet(df, p))
+            # Older copies carried the version in their file name
+            for stale_path in glob.glob(f"{glob.escape(path)}.v*.parquet"):
+                os.remove(stale_path)
+        except OSError:
+            pass  # Read-only location: keep serving from CSV
+
+    try:
+        os.makedirs(PICKLE_CACHE_DIR, mode=0o700, exist_ok=True)
+        write_atomic(pickle_path, lambda p: df.to_pickle(p, protocol=5))
+    except OSError:
+        pass  # No writable cache directory: the Parquet/CSV path still works
+    return df
+
+def read_cached(path, read):
+    """Reads an on-disk cache file, deleting it and returning None if it cannot be read."""
+    try:
+        return read(path)
+    except Exception:
+        try:
+            os.remove(path)  # Corrupt or incompatible copy: rebuild it from the CSV
+        except OSError:
+            pass
+        return None
+
+def read_parquet(path):
+    """Reads the Parquet copy, or returns None if it was written for another CACHE_VERSION."""
+    if pq.read_schema(path).metadata.get(b'cache_version') != str(CACHE_VERSION).encode():
+        return None
+    return pd.read_parquet(path, engine='pyarrow')
+
+def write_parquet(df, path):
+    """Writes the Parquet copy, tagged with CACHE_VERSION in its schema metadata."""
+    table = pa.Table.from_pandas(df)
+    table = table.replace_schema_metadata({**table.schema.metadata, b'cache_version': str(CACHE_VERSION).encode()})
+    pq.write_table(table, path, compression='zstd')
+
+def write_atomic(path, write):
+    """Calls write() on a temp file next to path, then renames it into place.
+
+    Readers never see a partially written cache file, even if the write fails midway.
+    """
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def read_csv(path):
+    """Reads the CSV and adds calculated fields, using Polars' multithreaded reader when installed."""
+    if pl is None:
+        return preprocess(pd.read_csv(path, usecols=lambda col: col in KEEP_COLUMNS))
+
+    dates = {col: pl.col(col).str.to_date(CSV_DATE_FORMAT, strict=False) for col in ('Order Date', 'Ship Date')}
+    df = (
+        pl.scan_csv(path, try_parse_dates=False, infer_schema_length=None)
+        # Projected at the scan so unused columns are never parsed
+        .select(cs.by_name(KEEP_COLUMNS, require_all=False))
+        .with_columns([
+            *(date.alias(col) for col, date in dates.items()),
+            # Flags rows holding a date that is not in CSV_DATE_FORMAT
+            pl.any_horizontal([pl.col(col).is_not_null() & date.is_null() for col, date in dates.items()])
+              .alias('_unparsed'),
+        ])
+        .with_columns([
+            (pl.col('Ship Date') - pl.col('Order Date')).dt.total_days().alias('Order Processing Time'),
+            pl.col('Ship Mode').replace_strict(SLA_MAP, default=UNDEFINED_SLA_DAYS, return_dtype=pl.Int16)
+              .alias('Standard SLA Days'),
+            (pl.col('Profit') / pl.when(pl.col('Sales') == 0).then(None).otherwise(pl.col('Sales')))
+              .alias('Profit Margin'),
+            pl.col('Order Date').dt.truncate('1q').cast(pl.Datetime).alias('order_quarter'),
+            pl.col('Order Date').dt.year().alias('order_year'),
+        ])
+        .with_columns(
+            (pl.col('Order Processing Time') > pl.col('Standard SLA Days')).fill_null(False).alias('Is Late')
+        )
+        .with_columns(pl.col('Order Date', 'Ship Date').cast(pl.Datetime))
+        .collect()
+        .to_pandas()
+    )
+    if df.pop('_unparsed').any():
+        # Dates in another layout are left to pandas' day-first parser
+        return preprocess(pd.read_csv(path, usecols=lambda col: col in KEEP_COLUMNS))
+    return finalize(df)
 
 def preprocess(df):
     """Preprocesses the dataframe by converting dates and adding calculated fields."""
@@ -21,30 +174,252 @@ def preprocess(df):
     # Calculate Order Processing Time (Lead Time)
     df['Order Processing Time'] = (df['Ship Date'] - df['Order Date']).dt.days
 
-    # Standard SLA days for each Ship Mode (adjust if needed)
-    sla_map = {
-        'Same Day': 1,
-        'First Class': 2,
-        'Second Class': 4,
-        'Standard Class': 5
-    }
-    df['Standard SLA Days'] = df['Ship Mode'].map(sla_map).fillna(999) # Using 999 for undefined modes
+    df['Standard SLA Days'] = df['Ship Mode'].map(SLA_MAP).fillna(UNDEFINED_SLA_DAYS)
 
     # Late Flag
-    df['Is Late'] = df['Order Processing Time'] > df['Standard SLA Days']
+    df['Is Late'] = df['Order Processing Time'].to_numpy() > df['Standard SLA Days'].to_numpy()
 
-    # Profit Margin
-    df['Profit Margin'] = df['Profit'] / df['Sales'].replace({0: np.nan})
+    # Profit Margin (NaN for zero sales), as one ufunc pass over the raw arrays
+    sales = df['Sales'].to_numpy(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['Profit Margin'] = np.where(sales == 0, np.nan, df['Profit'].to_numpy(np.float64) / sales)
 
     # Time-based columns for trend analysis
-    df['order_month'] = df['Order Date'].dt.to_period('M').dt.to_timestamp()
     df['order_quarter'] = df['Order Date'].dt.to_period('Q').dt.to_timestamp()
     df['order_year'] = df['Order Date'].dt.year
 
+    return finalize(df)
+
+def finalize(df):
+    """Drops unused columns, sorts by order date and converts columns to compact dtypes; shared by both CSV readers."""
+    df = df[[col for col in KEEP_COLUMNS if col in df.columns]]
+
+    # Sorted day index lets the date filter use a binary search instead of a full mask.
+    # Rows without an order date sort last with a sentinel so no date range selects them.
+    df = df.sort_values('Order Date', kind='stable').reset_index(drop=True)
+    order_date = df['Order Date'].values.astype('datetime64[D]')
+    df['_day'] = np.where(np.isnat(order_date), np.iinfo(np.int32).max,
+                          order_date.astype(np.int64)).astype(np.int32)
+    # Months since 1970-01 for the monthly reductions (never read for undated rows)
+    df['_month'] = np.where(np.isnat(order_date), -1,
+                            order_date.astype('datetime64[M]').astype(np.int64)).astype(np.int32)
+
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype('category')
+    # Order IDs are nearly unique per row, so keep them as Arrow-backed strings instead
+    df['Order ID'] = df['Order ID'].astype('string[pyarrow]')
+    df['Standard SLA Days'] = df['Standard SLA Days'].astype('int16')
+
+    # Narrower numeric columns halve the memory each sum/mean has to stream through.
+    # Sales, Profit and Shipping_Cost stay float64: their totals run into the millions,
+    # beyond what float32 can hold to the cent.
+    for col in ['Discount', 'Profit Margin']:
+        df[col] = df[col].astype('float32')
+    df['Quantity'] = df['Quantity'].astype('int32')
+    # Missing dates leave NaN lead times, which an integer column cannot hold
+    lead_time_dtype = 'float32' if df['Order Processing Time'].hasnans else 'int16'
+    df['Order Processing Time'] = df['Order Processing Time'].astype(lead_time_dtype)
+
     return df
 
+# -------------------- FILTERS & AGGREGATIONS --------------------
+# Cached on their arguments so sidebar reruns with unchanged filters are served from memory.
+
+def _month_totals(months, values, nmonths):
+    """Sums the non-NaN values and counts them per month index."""
+    sums = np.zeros(nmonths)
+    counts = np.zeros(nmonths, np.int64)
+    for i in range(months.size):
+        v = values[i]
+        if not np.isnan(v):
+            m = months[i]
+            sums[m] += v
+            counts[m] += 1
+    return sums, counts
+
+if njit is not None:
+    month_totals = njit(cache=True)(_month_totals)
+else:
+    def month_totals(months, values, nmonths):
+        """Sums the non-NaN values and counts them per month index."""
+        valid = ~np.isnan(values)
+        return (np.bincount(months[valid], weights=values[valid], minlength=nmonths),
+                np.bincount(months[valid], minlength=nmonths))
+
+def sum_by_cat(series_cat, values):
+    """Sums values per category with a single np.bincount pass over the category codes."""
+    return np.bincount(series_cat.cat.codes.to_numpy(), weights=values.to_numpy(np.float64),
+                       minlength=len(series_cat.cat.categories))
+
+def gb(df, key, columns=None):
+    """Groups by key without materialising unobserved categories or sorting the groups.
+
+    When columns is given, the frame is first projected onto the key and those columns
+    so the groupby only touches the data it aggregates.
+    """
+    if columns is not None:
+        df = df[(key if isinstance(key, list) else [key]) + columns]
+    return df.groupby(key, observed=True, sort=False)
+
+def apply_filters(df, date_range, regions, ship_modes):
+    """Returns the rows matching the selected date range, regions and ship modes."""
+    # Rows are sorted by '_day', so the date range is a contiguous slice found by binary search
+    bounds = np.array([date_range[0], date_range[1] + timedelta(days=1)], dtype='datetime64[D]')
+    i, j = np.searchsorted(df['_day'].values, bounds.astype(np.int64).astype(np.int32))
+    sub = df.iloc[i:j]
+    mask = (
+        (sub['Region'].isin(set(regions))) &
+        (sub['Ship Mode'].isin(set(ship_modes)))
+    )
+    return sub[mask]
+
+def monthly_summary(df_filtered):
+    """Average order processing time and total sales and profit per month."""
+    # Reduce over raw arrays of month offsets; filtered rows always have an order date
+    months = df_filtered['_month'].to_numpy()
+    first = months.min()
+    months = months - first
+    nmonths = int(months.max()) + 1
+    # Lead times are NaN where a ship date failed to parse; like .mean(), average only the rest
+    lead_time, lead_counts = month_totals(months, df_filtered['Order Processing Time'].to_numpy(np.float64), nmonths)
+    sales, _ = month_totals(months, df_filtered['Sales'].to_numpy(np.float64), nmonths)
+    profit, _ = month_totals(months, df_filtered['Profit'].to_numpy(np.float64), nmonths)
+    observed = np.bincount(months, minlength=nmonths) > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_lead_time = lead_time[observed] / lead_counts[observed]
+    return pd.DataFrame({
+        'order_month': (np.arange(nmonths)[observed] + first).astype('datetime64[M]').astype('datetime64[us]'),
+        'Order Processing Time': mean_lead_time,
+        'Sales': sales[observed],
+        'Profit': profit[observed]
+    })
+
+def ship_mode_summary(df_filtered):
+    """Average order processing time and total shipping cost per ship mode."""
+    # Filtered rows always have a ship mode, so every category code is non-negative
+    modes = df_filtered['Ship Mode']
+    codes = modes.cat.codes.to_numpy()
+    ncat = len(modes.cat.categories)
+    observed = np.bincount(codes, minlength=ncat) > 0
+    # Lead times are NaN where a ship date failed to parse; like .mean(), average only the rest
+    lead_time = df_filtered['Order Processing Time'].to_numpy(np.float64)
+    valid = ~np.isnan(lead_time)
+    lead_sums = np.bincount(codes[valid], weights=lead_time[valid], minlength=ncat)
+    lead_counts = np.bincount(codes[valid], minlength=ncat)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_lead_time = lead_sums[observed] / lead_counts[observed]
+    return pd.DataFrame({
+        'Ship Mode': modes.cat.categories[observed],
+        'Order Processing Time': mean_lead_time,
+        'Shipping_Cost': sum_by_cat(modes, df_filtered['Shipping_Cost'])[observed]
+    })
+
+# The groupby aggregations below are cached on filter_key (the data path and the filter
+# selections that produced the filtered frame) rather than on the frame itself, which costs
+# more to hash than the numpy aggregations above take to recompute.
+
+@st.cache_data(ttl=3600, max_entries=32)
+def orders_by_priority(filter_key, _df_filtered):
+    """Distinct order count and average processing time per order priority."""
+    return gb(_df_filtered, 'Order Priority', ['Order ID', 'Order Processing Time']).agg(
+        Order_Count=('Order ID', 'nunique'),
+        Avg_Time=('Order Processing Time', 'mean')
+    ).sort_index().reset_index()
+
+def sales_by_year(df_filtered):
+    """Total sales per year."""
+    return gb(df_filtered, 'order_year', ['Sales'])['Sales'].sum().reset_index()
+
+def sales_by_quarter(df_filtered):
+    """Total sales per quarter."""
+    return gb(df_filtered, 'order_quarter', ['Sales'])['Sales'].sum().sort_index().reset_index()
+
+@st.cache_data(ttl=3600, max_entries=32)
+def discount_vs_profit(filter_key, _df_filtered):
+    """Average discount and total profit per sub-category."""
+    return gb(_df_filtered, 'Sub-Category', ['Discount', 'Profit']).agg(
+        avg_discount=('Discount', 'mean'),
+        total_profit=('Profit', 'sum')
+    ).reset_index()
+
+@st.cache_data(ttl=3600, max_entries=32)
+def product_summary(filter_key, _df_filtered):
+    """Total sales, profit and quantity per product."""
+    return gb(_df_filtered, 'Product Name', ['Sales', 'Profit', 'Quantity']).agg(
+        Sales=('Sales', 'sum'),
+        Profit=('Profit', 'sum'),
+        Quantity=('Quantity', 'sum')
+    ).reset_index()
+
+@st.cache_data(ttl=3600, max_entries=32)
+def category_tree(filter_key, _df_filtered):
+    """Total sales and profit per category and sub-category."""
+    return gb(_df_filtered, ['Category', 'Sub-Category'], ['Sales', 'Profit']).agg(
+        Sales=('Sales', 'sum'),
+        Profit=('Profit', 'sum')
+    ).reset_index()
+
+@st.cache_data(ttl=3600, max_entries=32)
+def customer_summary(filter_key, _df_filtered):
+    """Total sales and profit per customer."""
+    return gb(_df_filtered, 'Customer Name', ['Sales', 'Profit']).agg(
+        Sales=('Sales', 'sum'),
+        Profit=('Profit', 'sum')
+    ).reset_index()
+
+@st.cache_data(ttl=3600, max_entries=32)
+def sales_by_region_segment(filter_key, _df_filtered):
+    """Total sales per region and customer segment."""
+    return gb(_df_filtered, ['Region', 'Segment'], ['Sales'])['Sales'].sum().sort_index().reset_index()
+
+def top_n(df, col, n, largest=True):
+    """Returns the n rows with the largest (or smallest) values of col, sorted ascending.
+
+    Uses a partial sort so only the selected rows are fully ordered.
+    """
+    if len(df) > n:
+        values = df[col].to_numpy()
+        df = df.iloc[np.argpartition(-values if largest else values, n - 1)[:n]]
+    return df.sort_values(col)
+
+# -------------------- CHARTS --------------------
+# The simple line and bar charts are built with graph_objects straight from numpy arrays,
+# skipping plotly.express' per-call dataframe inference and trace setup.
+
+def line_figure(df, x, y, title, markers=False, labels=None):
+    """Line chart of one column, or one trace per column when y is a list."""
+    labels = labels or {}
+    columns = y if isinstance(y, list) else [y]
+    fig = go.Figure([
+        go.Scatter(x=df[x].to_numpy(), y=df[col].to_numpy(), name=col,
+                   mode='lines+markers' if markers else 'lines')
+        for col in columns
+    ])
+    fig.update_layout(title=title, xaxis_title=labels.get(x, x), showlegend=len(columns) > 1)
+    if len(columns) == 1:
+        fig.update_layout(yaxis_title=labels.get(y, y))
+    else:
+        fig.update_layout(yaxis_title='value', legend_title_text='variable')
+    return fig
+
+def bar_figure(df, x, y, title, orientation='v', color=None, text_format=None):
+    """Bar chart, optionally shaded on a continuous scale by the color column."""
+    value_axis = 'x' if orientation == 'h' else 'y'
+    fig = go.Figure(go.Bar(
+        x=df[x].to_numpy(), y=df[y].to_numpy(), orientation=orientation,
+        marker=dict(color=df[color].to_numpy(), coloraxis='coloraxis') if color else None,
+        texttemplate=f"%{{{value_axis}:{text_format}}}" if text_format else None
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    if color:
+        fig.update_layout(coloraxis_colorbar_title_text=color)
+    return fig
+
 # -------------------- STREAMLIT UI --------------------
 
+# Scatter traces switch from SVG to WebGL above this many points
+WEBGL_MIN_POINTS = 1000
+
 st.set_page_config(page_title="Supply Chain Dashboard", layout="wide")
 st.title("📦 Supply Chain & Business Performance Dashboard")
 
@@ -68,35 +443,29 @@ min_date = df['Order Date'].min().date()
 max_date = df['Order Date'].max().date()
 date_range = st.sidebar.date_input("Order Date Range", [min_date, max_date], min_value=min_date, max_value=max_date)
 
-regions = st.sidebar.multiselect("Region", options=sorted(df['Region'].dropna().unique()), default=sorted(df['Region'].unique()))
-ship_modes = st.sidebar.multiselect("Ship Mode", options=sorted(df['Ship Mode'].dropna().unique()), default=sorted(df['Ship Mode'].unique()))
+# Categorical columns already hold their sorted unique values
+region_options = df['Region'].cat.categories.tolist()
+ship_mode_options = df['Ship Mode'].cat.categories.tolist()
+regions = st.sidebar.multiselect("Region", options=region_options, default=region_options)
+ship_modes = st.sidebar.multiselect("Ship Mode", options=ship_mode_options, default=ship_mode_options)
 
 # Apply filters
-mask = (
-    (df['Order Date'].dt.date >= date_range[0]) &
-    (df['Order Date'].dt.date <= date_range[1]) &
-    (df['Region'].isin(regions)) &
-    (df['Ship Mode'].isin(ship_modes))
-)
-df_filtered = df[mask]
+filter_key = (data_path, tuple(date_range), tuple(sorted(regions)), tuple(sorted(ship_modes)))
+df_filtered = apply_filters(df, *filter_key[1:])
 
 if df_filtered.empty:
     st.warning("No data available for the selected filters. Please adjust your filter criteria.")
     st.stop()
 
-
-# Tabs
-tab1, tab2, tab3, tab4 = st.tabs([
-    "Supply Chain & Fulfillment",
-    "Financial Performance",
-    "Product & Inventory",
-    "Customer & Regional"
-])
-
 # -------------------- TAB 1: SUPPLY CHAIN --------------------
-with tab1:
+def render_supply_chain(df_filtered, filter_key):
+    """Renders fulfillment KPIs and processing-time charts."""
     st.subheader("🚚 Supply Chain & Fulfillment Dashboard")
 
+    monthly = monthly_summary(df_filtered)
+    ship_mode = ship_mode_summary(df_filtered)
+    pri = orders_by_priority(filter_key, df_filtered)
+
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Avg Order Processing (Days)", round(df_filtered['Order Processing Time'].mean(), 2))
     col2.metric("Total Orders", int(df_filtered['Order ID'].nunique()))
@@ -106,33 +475,34 @@ with tab1:
     col4.metric("Late Order %", f"{late_pct:.1f}%")
 
     # Line Chart: Avg processing time over time
-    monthly = df_filtered.groupby('order_month')['Order Processing Time'].mean().reset_index()
-    fig1 = px.line(monthly, x='order_month', y='Order Processing Time', markers=True,
-                   title="Average Order Processing Time Over Time")
-    st.plotly_chart(fig1, use_container_width=True)
+    fig1 = line_figure(monthly, 'order_month', 'Order Processing Time', markers=True,
+                       title="Average Order Processing Time Over Time")
+    st.plotly_chart(fig1, width='stretch')
 
     c1, c2 = st.columns(2)
     with c1:
         # Bar Chart: Avg processing time by Ship Mode
-        mode_avg = df_filtered.groupby('Ship Mode')['Order Processing Time'].mean().reset_index()
-        fig2 = px.bar(mode_avg, x='Ship Mode', y='Order Processing Time',
-                      title="Average Processing Time by Ship Mode", color='Order Processing Time')
-        st.plotly_chart(fig2, use_container_width=True)
+        fig2 = bar_figure(ship_mode, 'Ship Mode', 'Order Processing Time',
+                          title="Average Processing Time by Ship Mode", color='Order Processing Time')
+        st.plotly_chart(fig2, width='stretch')
     with c2:
         # Bar Chart: Order count by Priority
-        pri = df_filtered.groupby('Order Priority').agg(
-            Order_Count=('Order ID', 'nunique'),
-            Avg_Time=('Order Processing Time', 'mean')
-        ).reset_index()
-        fig3 = px.bar(pri, x='Order Priority', y='Order_Count', color='Avg_Time',
-                      title="Order Count by Order Priority (Color: Avg Processing Time)")
-        st.plotly_chart(fig3, use_container_width=True)
+        fig3 = bar_figure(pri, 'Order Priority', 'Order_Count', color='Avg_Time',
+                          title="Order Count by Order Priority (Color: Avg Processing Time)")
+        st.plotly_chart(fig3, width='stretch')
 
 
 # -------------------- TAB 2: FINANCIAL PERFORMANCE --------------------
-with tab2:
+def render_financial_performance(df_filtered, filter_key):
+    """Renders sales, profit and shipping-cost charts."""
     st.subheader("💰 Financial Performance Dashboard")
 
+    monthly = monthly_summary(df_filtered)
+    ship_mode = ship_mode_summary(df_filtered)
+    yearly_sales = sales_by_year(df_filtered)
+    quarterly_sales = sales_by_quarter(df_filtered)
+    disc_prof = discount_vs_profit(filter_key, df_filtered)
+
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Sales", f"${df_filtered['Sales'].sum():,.0f}")
     col2.metric("Total Profit", f"${df_filtered['Profit'].sum():,.0f}")
@@ -143,29 +513,26 @@ with tab2:
     st.subheader("Sales Trends")
 
     # Line Chart: Sales vs Profit Over Time (Monthly)
-    time_agg = df_filtered.groupby('order_month')[['Sales', 'Profit']].sum().reset_index()
-    fig4 = px.line(time_agg, x='order_month', y=['Sales', 'Profit'],
-                   title="Monthly Sales vs Profit Over Time")
-    st.plotly_chart(fig4, use_container_width=True)
+    fig4 = line_figure(monthly, 'order_month', ['Sales', 'Profit'],
+                       title="Monthly Sales vs Profit Over Time")
+    st.plotly_chart(fig4, width='stretch')
 
     trend_col1, trend_col2 = st.columns(2)
 
     with trend_col1:
         # NEW: Bar Chart: Sales by Year
-        yearly_sales = df_filtered.groupby('order_year')['Sales'].sum().reset_index()
         fig_yearly = px.bar(yearly_sales, x='order_year', y='Sales',
                             title="Total Sales by Year", text_auto='.2s',
                             labels={'order_year': 'Year', 'Sales': 'Total Sales'})
         fig_yearly.update_traces(textangle=0, textposition="outside")
-        st.plotly_chart(fig_yearly, use_container_width=True)
+        st.plotly_chart(fig_yearly, width='stretch')
 
     with trend_col2:
         # NEW: Line Chart: Sales by Quarter
-        quarterly_sales = df_filtered.groupby('order_quarter')['Sales'].sum().reset_index()
-        fig_quarterly = px.line(quarterly_sales, x='order_quarter', y='Sales', markers=True,
-                                title="Total Sales by Quarter",
-                                labels={'order_quarter': 'Quarter', 'Sales': 'Total Sales'})
-        st.plotly_chart(fig_quarterly, use_container_width=True)
+        fig_quarterly = line_figure(quarterly_sales, 'order_quarter', 'Sales', markers=True,
+                                    title="Total Sales by Quarter",
+                                    labels={'order_quarter': 'Quarter', 'Sales': 'Total Sales'})
+        st.plotly_chart(fig_quarterly, width='stretch')
 
     st.markdown("---")
     st.subheader("Profitability Analysis")
@@ -173,32 +540,26 @@ with tab2:
     c1, c2 = st.columns(2)
     with c1:
         # Scatter: Discount vs Profit by Sub-Category
-        disc_prof = df_filtered.groupby('Sub-Category').agg(
-            avg_discount=('Discount', 'mean'),
-            total_profit=('Profit', 'sum')
-        ).reset_index()
         fig5 = px.scatter(disc_prof, x='avg_discount', y='total_profit', color='total_profit',
                           size='total_profit', hover_name='Sub-Category',
                           title="Discount vs Profit by Sub-Category",
-                          labels={'avg_discount': 'Average Discount', 'total_profit': 'Total Profit'})
-        st.plotly_chart(fig5, use_container_width=True)
+                          labels={'avg_discount': 'Average Discount', 'total_profit': 'Total Profit'},
+                          render_mode='webgl' if len(disc_prof) > WEBGL_MIN_POINTS else 'svg')
+        st.plotly_chart(fig5, width='stretch')
     with c2:
         # Bar: Shipping Cost by Ship Mode
-        ship_cost = df_filtered.groupby('Ship Mode')['Shipping_Cost'].sum().reset_index()
-        fig6 = px.bar(ship_cost, x='Ship Mode', y='Shipping_Cost',
-                      title="Total Shipping Cost by Ship Mode", color='Shipping_Cost', text_auto='.2s')
-        st.plotly_chart(fig6, use_container_width=True)
+        fig6 = bar_figure(ship_mode, 'Ship Mode', 'Shipping_Cost',
+                          title="Total Shipping Cost by Ship Mode", color='Shipping_Cost', text_format='.2s')
+        st.plotly_chart(fig6, width='stretch')
 
 
 # -------------------- TAB 3: PRODUCT & INVENTORY --------------------
-with tab3:
+def render_product_inventory(df_filtered, filter_key):
+    """Renders product rankings and the category treemap."""
     st.subheader("📦 Product & Inventory Analysis")
 
-    prod_agg = df_filtered.groupby('Product Name').agg(
-        Sales=('Sales', 'sum'),
-        Profit=('Profit', 'sum'),
-        Quantity=('Quantity', 'sum')
-    ).reset_index()
+    prod_agg = product_summary(filter_key, df_filtered)
+    cat_tree = category_tree(filter_key, df_filtered)
 
     best_selling = prod_agg.sort_values('Sales', ascending=False).head(1)
     most_profitable = prod_agg.sort_values('Profit', ascending=False).head(1)
@@ -211,62 +572,77 @@ with tab3:
     c1, c2 = st.columns(2)
     with c1:
         # Top 10 products by Sales
-        top10_sales = prod_agg.sort_values('Sales', ascending=True).tail(10)
-        fig7 = px.bar(top10_sales, x='Sales', y='Product Name', orientation='h', title="Top 10 Products by Sales")
-        st.plotly_chart(fig7, use_container_width=True)
+        top10_sales = top_n(prod_agg, 'Sales', 10)
+        fig7 = bar_figure(top10_sales, 'Sales', 'Product Name', orientation='h', title="Top 10 Products by Sales")
+        st.plotly_chart(fig7, width='stretch')
     with c2:
         # Bottom 10 products by Profit
-        bottom10_profit = prod_agg.sort_values('Profit', ascending=True).head(10)
-        fig8 = px.bar(bottom10_profit, x='Profit', y='Product Name', orientation='h',
-                      title="Bottom 10 Products by Profit")
-        st.plotly_chart(fig8, use_container_width=True)
+        bottom10_profit = top_n(prod_agg, 'Profit', 10, largest=False)
+        fig8 = bar_figure(bottom10_profit, 'Profit', 'Product Name', orientation='h',
+                          title="Bottom 10 Products by Profit")
+        st.plotly_chart(fig8, width='stretch')
 
     # Treemap: Sales by Category & Sub-Category
-    cat_tree = df_filtered.groupby(['Category', 'Sub-Category']).agg(
-        Sales=('Sales', 'sum'),
-        Profit=('Profit', 'sum')
-    ).reset_index()
     fig9 = px.treemap(cat_tree, path=['Category', 'Sub-Category'], values='Sales',
                       color='Profit', title="Sales by Category and Sub-Category",
                       color_continuous_scale='RdYlGn')
-    st.plotly_chart(fig9, use_container_width=True)
+    st.plotly_chart(fig9, width='stretch')
 
 
 # -------------------- TAB 4: CUSTOMER & REGIONAL --------------------
-with tab4:
+def render_customer_regional(df_filtered, filter_key):
+    """Renders customer KPIs and regional segment breakdowns."""
     st.subheader("🌎 Customer & Regional Dashboard")
 
+    cust_agg = customer_summary(filter_key, df_filtered)
+    top_cust = cust_agg.nlargest(1, 'Sales')
+    top_cust_profit = top_n(cust_agg, 'Profit', 10)
+    # Region and segment views are rolled up from the small region x segment aggregate
+    reg_seg = sales_by_region_segment(filter_key, df_filtered)
+    top_region = gb(reg_seg, 'Region')['Sales'].sum().reset_index().nlargest(1, 'Sales')
+    seg = gb(reg_seg, 'Segment')['Sales'].sum().reset_index()
+    pivot_table = reg_seg.pivot_table(index='Region', columns='Segment', values='Sales', aggfunc='sum', fill_value=0, observed=True)
+
     col1, col2, col3 = st.columns(3)
     col1.metric("Total Customers", df_filtered['Customer ID'].nunique())
 
-    top_cust = df_filtered.groupby('Customer Name')['Sales'].sum().reset_index().sort_values('Sales', ascending=False).head(1)
-    top_region = df_filtered.groupby('Region')['Sales'].sum().reset_index().sort_values('Sales', ascending=False).head(1)
-
     col2.metric("Top Customer by Sales", f"{top_cust.iloc[0]['Customer Name']}" if not top_cust.empty else "N/A", f"${top_cust.iloc[0]['Sales']:,.0f}")
     col3.metric("Top Region by Sales", f"{top_region.iloc[0]['Region']}" if not top_region.empty else "N/A", f"${top_region.iloc[0]['Sales']:,.0f}")
 
     c1, c2 = st.columns(2)
     with c1:
         # Donut: Sales by Segment
-        seg = df_filtered.groupby('Segment')['Sales'].sum().reset_index()
         fig11 = px.pie(seg, names='Segment', values='Sales', hole=0.45, title="Sales by Customer Segment")
-        st.plotly_chart(fig11, use_container_width=True)
+        st.plotly_chart(fig11, width='stretch')
     with c2:
         # Top 10 Customers by Profit
-        top_cust_profit = df_filtered.groupby('Customer Name')['Profit'].sum().reset_index().sort_values('Profit', ascending=False).head(10).sort_values('Profit', ascending=True)
-        fig12 = px.bar(top_cust_profit, x='Profit', y='Customer Name', orientation='h', title="Top 10 Customers by Profit")
-        st.plotly_chart(fig12, use_container_width=True)
+        fig12 = bar_figure(top_cust_profit, 'Profit', 'Customer Name', orientation='h', title="Top 10 Customers by Profit")
+        st.plotly_chart(fig12, width='stretch')
 
     st.markdown("---")
     # --- FULFILLS REQUEST: Sales by Customer Type (Segment) and Region ---
     st.subheader("Regional Sales Analysis by Customer Segment")
 
     # Stacked Bar: Sales by Region & Segment
-    reg_seg = df_filtered.groupby(['Region', 'Segment'])['Sales'].sum().reset_index()
     fig13 = px.bar(reg_seg, x='Region', y='Sales', color='Segment', title="Sales by Region and Segment")
-    st.plotly_chart(fig13, use_container_width=True)
+    st.plotly_chart(fig13, width='stretch')
 
     # NEW: Pivot table for detailed view
     st.write("Detailed Sales Data by Region and Segment")
-    pivot_table = df_filtered.pivot_table(index='Region', columns='Segment', values='Sales', aggfunc='sum', fill_value=0)
-    st.dataframe(pivot_table.style.format("${:,.2f}"))
\ No newline at end of file
+    st.dataframe(pivot_table.style.format("${:,.2f}"))
+
+
+# -------------------- TABS --------------------
+# Switching tabs reruns the script, so only the open tab's aggregations and figures are built
+tab1, tab2, tab3, tab4 = st.tabs([
+    "Supply Chain & Fulfillment",
+    "Financial Performance",
+    "Product & Inventory",
+    "Customer & Regional"
+], key='active_tab', on_change='rerun')
+
+for tab, render in [(tab1, render_supply_chain), (tab2, render_financial_performance),
+                    (tab3, render_product_inventory), (tab4, render_customer_regional)]:
+    with tab:
+        if tab.open:
+            render(df_filtered, filter_key)